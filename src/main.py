@@ -1,11 +1,13 @@
 import logging
-import json
 import asyncio
 import random
-from datetime import datetime, timezone
+import time
+from dataclasses import dataclass
 import os
 from dotenv import load_dotenv
-import requests
+import aiohttp
+import orjson
+import ijson
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
@@ -19,33 +21,82 @@ API_PASSWORD = os.getenv("API_PASSWORD")
 ADMIN_ROLE_ID = int(os.getenv("ADMIN_ROLE_ID"))
 WEBHOOK_URL = os.getenv("WEBHOOK_URL")
 LANGUAGE = os.getenv("LANGUAGE", "en")
+GUILD_ID = int(os.getenv("GUILD_ID")) if os.getenv("GUILD_ID") else None
+
+API_TIMEOUT = aiohttp.ClientTimeout(total=5)
+WEBHOOK_TIMEOUT = aiohttp.ClientTimeout(total=10)
+STATS_INTERVAL = 30  # Seconds between status updates while the server is online
+MAX_STATS_INTERVAL = 300  # Upper bound for the polling interval while the server is offline
+STATUS_REFRESH_INTERVAL = 300  # Seconds after which an unchanged status message is still edited to refresh the uptime
+PLAYER_LIST_MAX_AGE = 30  # Seconds before the cached player list is refetched
+BANLIST_REFRESH_INTERVAL = 5  # Minutes between background ban list refreshes
+BANLIST_MAX_AGE = 360  # Seconds before commands refetch the ban list themselves, slightly above the refresh interval
+STREAM_PARSE_MIN_SIZE = 64 * 1024  # Player lists at least this large (in bytes) are parsed incrementally
+HTTP_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError, ijson.JSONError)
+JSON_HEADERS = {"Content-Type": "application/json"}
+BASE_PARAMS = {"password": API_PASSWORD}
 
 # Enable basic logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # Load translations
 def load_translations(language):
-    with open(f'lang/{language}.json', 'r', encoding='utf-8') as file:
-        return json.load(file)
+    with open(f'lang/{language}.json', 'rb') as file:
+        return orjson.loads(file.read())
 
 translations = load_translations(LANGUAGE)
 
 # Bot Setup
 intents = discord.Intents.default()
-intents.message_content = True
+intents.message_content = False  # Only slash commands are used, message content is never read
 bot = commands.Bot(command_prefix="/", intents=intents, sync_commands=True)
-tracking_channel_id = None
-status_message_id = None
-server_offline_message_sent = False
-webhook_message_id = None
-server_start_time = None
-server_online = False
-cached_player_list = None
+
+@dataclass(slots=True)
+class BotState:
+    """Runtime state shared between the commands and the stats loop."""
+    tracking_channel_id: int | None = None
+    status_message: discord.PartialMessage | None = None
+    server_offline_message_sent: bool = False
+    webhook_message_id: str | None = None
+    server_start_mono: float | None = None
+    server_online: bool = False
+    name_to_uid: dict | None = None
+    cached_player_names: tuple = ()
+    cached_player_list_at: float = 0.0
+    offline_polls: int = 0
+    last_digest: int | None = None
+    last_edit_at: float = 0.0
+    online_embed: discord.Embed | None = None
+    commands_synced: bool = False
+    banlist: dict | None = None
+    ban_name_to_uid: dict | None = None
+    banlist_at: float = 0.0
+    banlist_generation: int = 0
+
+STATE = BotState()
+session = None  # Shared aiohttp.ClientSession, created in main()
+background_tasks = set()  # Strong references to fire-and-forget tasks until they finish
 
 # Define emojis
 GREEN_DOT = "<:green_circle:1252142135581163560>"
 RED_DOT = "<:red_circle:1252142033758459011>"
 
+# Translations never change after loading, so the embed texts are rendered once
+EMBED_TITLE = "Motor Town Server Status"
+T_STATUS = translations["server_status"]
+T_UPTIME = translations["uptime"]
+T_PLAYERS_ONLINE = translations["players_online"]
+T_PLAYER_NAMES = translations["player_names"]
+T_NO_PLAYERS = translations["no_players_online"]
+T_BANNED_PLAYERS = translations["banned_players"]
+T_NO_BANNED_PLAYERS = translations["no_banned_players"]
+ONLINE_VALUE = f"{GREEN_DOT} | {translations['server_online']}"
+OFFLINE_VALUE = f"{RED_DOT} {translations['server_offline']}"
+
+# The offline embed has no dynamic fields, so a single instance is shared
+OFFLINE_EMBED = discord.Embed(title=EMBED_TITLE, color=discord.Color.red())
+OFFLINE_EMBED.add_field(name=T_STATUS, value=OFFLINE_VALUE, inline=False)
+
 def is_admin():
     """Check if the user has the admin role."""
     async def predicate(interaction: discord.Interaction):
@@ -58,345 +109,440 @@ def is_admin():
         return role in interaction.user.roles
     return app_commands.check(predicate)
 
+def is_retryable(error):
+    """Check if a failed request may succeed when repeated: timeouts, connection errors and 5xx answers."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status >= 500
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+async def aretry(coro_factory, retries=3, base=1.0, retry_if=is_retryable):
+    """Awaits coro_factory(), retrying transient failures of idempotent requests with jittered exponential backoff."""
+    for attempt in range(retries):
+        try:
+            return await coro_factory()
+        except HTTP_ERRORS as e:
+            logging.error(f"HTTP request failed (attempt {attempt + 1}/{retries}): {e}")
+            if attempt == retries - 1 or not retry_if(e):
+                raise
+            await asyncio.sleep(base * 2 ** attempt + random.random())
+
+async def read_json(response):
+    """Decodes a JSON response body from its raw bytes, skipping the str decode done by response.json()."""
+    return orjson.loads(await response.read())
+
+async def api_get(path, params=None):
+    """Performs a GET request against the server API and returns the decoded JSON body."""
+    async with session.get(f"{API_BASE_URL}{path}", params=params or BASE_PARAMS, timeout=API_TIMEOUT) as response:
+        response.raise_for_status()
+        return await read_json(response)
+
+async def api_get_players():
+    """Fetches the player list from the server API and returns a (name, unique_id) pair per player."""
+    async with session.get(f"{API_BASE_URL}/player/list", params=BASE_PARAMS, timeout=API_TIMEOUT) as response:
+        response.raise_for_status()
+        # Small lists are cheaper to decode in one go, large ones are streamed so only one player is held at a time
+        if response.content_length is not None and response.content_length >= STREAM_PARSE_MIN_SIZE:
+            return [(player["name"], player["unique_id"]) async for _, player in ijson.kvitems_async(response.content, "data")]
+        player_list = (await read_json(response))["data"] or {}
+        return [(player["name"], player["unique_id"]) for player in player_list.values()]
+
+async def api_post(path, params=None):
+    """Performs a POST request against the server API and returns the response status."""
+    async with session.post(f"{API_BASE_URL}{path}", params=params or BASE_PARAMS, timeout=API_TIMEOUT) as response:
+        response.raise_for_status()
+        return response.status
+
 async def send_webhook_message(message):
     """Sends a message to the Discord webhook."""
-    global webhook_message_id
+
     try:
         data = {"content": message}
-        response = requests.post(WEBHOOK_URL, json=data)
-        response.raise_for_status()
-        logging.info(f"Webhook message sent successfully, response: {response.status_code}")
-        webhook_message_id = response.json()['id']
-    except requests.exceptions.RequestException as e:
+        # wait=true makes Discord return the created message, which holds the id needed to remove it later
+        async with session.post(WEBHOOK_URL, params={"wait": "true"}, data=orjson.dumps(data), headers=JSON_HEADERS, timeout=WEBHOOK_TIMEOUT) as response:
+            response.raise_for_status()
+            logging.info(f"Webhook message sent successfully, response: {response.status}")
+            STATE.webhook_message_id = (await read_json(response))['id']
+    except HTTP_ERRORS as e:
         logging.error(f"Error sending webhook message: {e}")
         return False
     return True
 
-async def remove_webhook_message():
+def run_in_background(coro):
+    """Schedules a coroutine as a task without awaiting it."""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def remove_webhook_message(message_id):
     """Removes the message from the discord webhook"""
-    global webhook_message_id
+
+    async def delete_message():
+        async with session.delete(f'{WEBHOOK_URL}/messages/{message_id}', timeout=WEBHOOK_TIMEOUT) as response:
+            response.raise_for_status()
+            logging.info(f"Removed webhook message: {response.status}")
+
     try:
-        response = requests.delete(f'{WEBHOOK_URL}/messages/{webhook_message_id}')
-        response.raise_for_status()
-        logging.info(f"Removed webhook message: {response.status_code}")
-        webhook_message_id = None
-    except requests.exceptions.RequestException as e:
+        await aretry(delete_message)
+        # A newer offline message may have been sent while this one was being removed
+        if STATE.webhook_message_id == message_id:
+            STATE.webhook_message_id = None
+    except HTTP_ERRORS as e:
         logging.error(f"Error removing webhook message: {e}")
         return False
     return True
 
+def cache_player_list(players):
+    """Stores the player names and a name to unique id index of the player list, along with the fetch time."""
+    STATE.cached_player_names = tuple(name for name, _ in players)
+    STATE.name_to_uid = dict(players)
+    STATE.cached_player_list_at = time.monotonic()
+
 async def fetch_player_data():
     """Fetches player count and player list data from the API with backoff retry."""
-    global server_offline_message_sent, webhook_message_id, server_start_time, server_online, cached_player_list
-    player_count_url = f"{API_BASE_URL}/player/count?password={API_PASSWORD}"
-    player_list_url = f"{API_BASE_URL}/player/list?password={API_PASSWORD}"
+
+    async def fetch():
+        return await asyncio.gather(api_get("/player/count"), api_get_players())
+
+    try:
+        count_data, players = await aretry(fetch)
+    except HTTP_ERRORS as e:
+        logging.error(f"Error fetching API Data: {e}")
+        if not STATE.server_offline_message_sent:
+            await send_webhook_message("Server cannot be reached. It has either crashed or restarted.")
+            STATE.server_offline_message_sent = True
+            STATE.server_start_mono = None
+            STATE.server_online = False
+            STATE.name_to_uid = None
+            STATE.cached_player_names = ()
+        return None, None, False
+
+    if STATE.server_offline_message_sent:
+        # Nobody waits for the stale offline notice to disappear, so don't hold up recovery on it
+        if STATE.webhook_message_id:
+            run_in_background(remove_webhook_message(STATE.webhook_message_id))
+        STATE.server_offline_message_sent = False
+        logging.info("Server back online detected")
+
+        STATE.server_start_mono = time.monotonic()
     
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            count_response = requests.get(player_count_url, timeout=5)
-            count_response.raise_for_status()
-            count_data = count_response.json()
-        
-            list_response = requests.get(player_list_url, timeout=5)
-            list_response.raise_for_status()
-            list_data = list_response.json()
-
-            if server_offline_message_sent:
-                await remove_webhook_message()
-                server_offline_message_sent = False
-                logging.info("Server back online detected")
-
-                server_start_time = datetime.now(timezone.utc)
-                server_online = True
-                cached_player_list = None
-            
-            server_online = True
-            
-            if not server_start_time:
-                server_start_time = datetime.now(timezone.utc)
-            
-            return count_data, list_data, True
+    STATE.server_online = True
+    cache_player_list(players)
+    
+    if STATE.server_start_mono is None:
+        STATE.server_start_mono = time.monotonic()
     
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Error fetching API Data (attempt {attempt + 1}/{max_retries}): {e}")
-            if attempt == max_retries - 1:
-                if not server_offline_message_sent:
-                    await send_webhook_message("Server cannot be reached. It has either crashed or restarted.")
-                    server_offline_message_sent = True
-                    server_start_time = None
-                    server_online = False
-                    cached_player_list = None
-                return None, None, False
-            retry_delay = (2 ** attempt) + random.uniform(0, 1)
-            await asyncio.sleep(retry_delay)
+    return count_data, players, True
+
+async def resolve_unique_id(player_name):
+    """Looks up a player's unique id, reusing the cached player list while it is fresh."""
+    if STATE.name_to_uid is not None and time.monotonic() - STATE.cached_player_list_at <= PLAYER_LIST_MAX_AGE:
+        unique_id = STATE.name_to_uid.get(player_name)
+        if unique_id is not None:
+            return unique_id
+
+    # The cache is missing, stale or the player joined after the last fetch
+    cache_player_list(await aretry(api_get_players))
+    return STATE.name_to_uid.get(player_name)
+
+def index_banlist(ban_data):
+    """Builds a name to unique id index of the ban list."""
+    return {player["name"]: player["unique_id"] for player in (ban_data["data"] or {}).values()}
+
+def cache_banlist(ban_data, generation):
+    """Stores the ban list along with its index and the fetch time, unless it was invalidated during the fetch."""
+    # A ban or unban that completed while this list was in flight makes it outdated
+    if generation != STATE.banlist_generation:
+        return
+    STATE.banlist = ban_data
+    STATE.ban_name_to_uid = index_banlist(ban_data)
+    STATE.banlist_at = time.monotonic()
+
+async def fetch_banlist():
+    """Fetches the ban list from the API, caches it and returns it."""
+    generation = STATE.banlist_generation
+    ban_data = await aretry(lambda: api_get("/player/banlist"))
+    cache_banlist(ban_data, generation)
+    return ban_data
+
+def invalidate_banlist():
+    """Drops the cached ban list so the next lookup fetches it again."""
+    STATE.banlist_generation += 1
+    STATE.banlist = None
+    STATE.ban_name_to_uid = None
+
+async def get_banlist():
+    """Returns the ban list, fetching it when the cached copy is missing or stale."""
+    if STATE.banlist is None or time.monotonic() - STATE.banlist_at > BANLIST_MAX_AGE:
+        return await fetch_banlist()
+    return STATE.banlist
+
+async def resolve_banned_unique_id(player_name):
+    """Looks up a banned player's unique id, reusing the cached ban list while it is fresh."""
+    if STATE.ban_name_to_uid is not None and time.monotonic() - STATE.banlist_at <= BANLIST_MAX_AGE:
+        unique_id = STATE.ban_name_to_uid.get(player_name)
+        if unique_id is not None:
+            return unique_id
+
+    # The cache is missing, stale or the player was banned after the last fetch
+    return index_banlist(await fetch_banlist()).get(player_name)
 
 def format_uptime():
     """Calculates and formats the server uptime."""
-    global server_start_time
-    if server_start_time:
-        uptime = datetime.now(timezone.utc) - server_start_time
-        days = uptime.days
-        hours, remainder = divmod(uptime.seconds, 3600)
+    if STATE.server_start_mono is not None:
+        elapsed = int(time.monotonic() - STATE.server_start_mono)
+        days, remainder = divmod(elapsed, 86400)
+        hours, remainder = divmod(remainder, 3600)
         minutes, seconds = divmod(remainder, 60)
         uptime_str = f"{days}d {hours}h {minutes}m {seconds}s" if days > 0 else f"{hours}h {minutes}m {seconds}s"
         return uptime_str
     else:
         return "Offline"
 
-async def create_embed(count_data, list_data, server_online):
-    """Creates a Discord Embed with formatted player data."""
+async def create_embed(count_data, players, server_online):
+    """Updates the persistent Discord Embed with formatted player data."""
     uptime = format_uptime()
-    global cached_player_list
 
     if not server_online:
-        embed = discord.Embed(title="Motor Town Server Status", color=discord.Color.red())
-        embed.add_field(name=translations["server_status"], value=f"{RED_DOT} {translations['server_offline']}", inline=False)
-        return embed
+        return OFFLINE_EMBED
     
-    if not count_data or not list_data:
+    if not count_data or players is None:
         return None
     num_players = count_data["data"]["num_players"]
-    player_list = list_data["data"]
 
-    cached_player_list = player_list
+    # The online embed always has the same four fields, so it is built once and only the values change
+    embed = STATE.online_embed
+    if embed is None:
+        embed = discord.Embed(title=EMBED_TITLE, color=discord.Color.green())
+        embed.add_field(name=T_STATUS, value=ONLINE_VALUE, inline=False)
+        embed.add_field(name=T_UPTIME, value=uptime, inline=False)
+        embed.add_field(name=T_PLAYERS_ONLINE, value=f"{num_players}", inline=False)
+        embed.add_field(name=T_PLAYER_NAMES, value=T_NO_PLAYERS, inline=False)
+        STATE.online_embed = embed
+    else:
+        embed.set_field_at(1, name=T_UPTIME, value=uptime, inline=False)
+        embed.set_field_at(2, name=T_PLAYERS_ONLINE, value=f"{num_players}", inline=False)
 
-    embed = discord.Embed(title="Motor Town Server Status", color=discord.Color.green())
-    embed.add_field(name=translations["server_status"], value=f"{GREEN_DOT} | {translations['server_online']}", inline=False)
-    embed.add_field(name=translations["uptime"], value=uptime, inline=False)
-    embed.add_field(name=translations["players_online"], value=f"{num_players}", inline=False)
-    
-    if player_list:
-        player_names = "\n".join([player["name"] for _, player in player_list.items()])
-        embed.add_field(name=translations["player_names"], value=player_names, inline=False)
+    if STATE.cached_player_names:
+        player_names = "\n".join(STATE.cached_player_names)
+        embed.set_field_at(3, name=T_PLAYER_NAMES, value=player_names, inline=False)
     else:
-        embed.add_field(name=translations["player_names"], value=translations["no_players_online"], inline=False)
+        embed.set_field_at(3, name=T_PLAYER_NAMES, value=T_NO_PLAYERS, inline=False)
     return embed
 
 async def create_banlist_embed(ban_data):
     """Creates a Discord Embed with the banned player list."""
     if not ban_data or not ban_data['data']:
-        embed = discord.Embed(title=translations["banned_players"], color=discord.Color.red())
-        embed.add_field(name=translations["banned_players"], value=translations["no_banned_players"], inline=False)
+        embed = discord.Embed(title=T_BANNED_PLAYERS, color=discord.Color.red())
+        embed.add_field(name=T_BANNED_PLAYERS, value=T_NO_BANNED_PLAYERS, inline=False)
         return embed
 
     banned_players = ban_data['data']
-    embed = discord.Embed(title=translations["banned_players"], color=discord.Color.red())
+    embed = discord.Embed(title=T_BANNED_PLAYERS, color=discord.Color.red())
     if banned_players:
-        banned_names = "\n".join([player["name"] for _, player in banned_players.items()])
-        embed.add_field(name=translations["banned_players"], value=banned_names, inline=False)
+        banned_names = "\n".join(player["name"] for player in banned_players.values())
+        embed.add_field(name=T_BANNED_PLAYERS, value=banned_names, inline=False)
     return embed
 
 @bot.tree.command(name="showmtstats", description="Activates server statistics updates in the current channel.")
 @is_admin()
 async def show_mt_stats(interaction: discord.Interaction):
-    global tracking_channel_id, status_message_id, server_online
-    tracking_channel_id = interaction.channel_id
+    STATE.tracking_channel_id = interaction.channel_id
 
     if not update_stats.is_running():
         await interaction.response.defer()
-        count_data, list_data, server_online = await fetch_player_data()
-        if server_online:
-            embed = await create_embed(count_data, list_data, server_online)
+        STATE.last_digest = None
+        count_data, players, STATE.server_online = await fetch_player_data()
+        if STATE.server_online:
+            embed = await create_embed(count_data, players, STATE.server_online)
             if embed:
                 ctx = await commands.Context.from_interaction(interaction)
                 status_message = await ctx.send(embed=embed)
-                status_message_id = status_message.id
+                # ctx.send returns a followup message whose interaction token expires after 15 minutes,
+                # so keep a partial message that is edited with the bot token without being fetched
+                STATE.status_message = interaction.channel.get_partial_message(status_message.id)
                 update_stats.start()
                 await interaction.followup.send("Player statistics updates started in this channel.", ephemeral=True)
         else:
-            embed = await create_embed(None, None, server_online)
+            embed = await create_embed(None, None, STATE.server_online)
             ctx = await commands.Context.from_interaction(interaction)
             status_message = await ctx.send(embed=embed)
-            status_message_id = status_message.id
+            STATE.status_message = interaction.channel.get_partial_message(status_message.id)
             update_stats.start()
             await interaction.followup.send("Server is offline. Stats started", ephemeral=True)
     else:
         await interaction.response.send_message("Player statistics updates already running in this channel", ephemeral=True)
 
+def reset_stats_backoff():
+    """Resets the offline backoff so the next stats run starts at the normal interval."""
+    STATE.offline_polls = 0
+    update_stats.change_interval(seconds=STATS_INTERVAL)
+
 @bot.tree.command(name="removemtstats", description="Deactivates server statistics updates.")
 @is_admin()
 async def remove_mt_stats(interaction: discord.Interaction):
-    global tracking_channel_id, status_message_id
-    if update_stats.is_running() and tracking_channel_id == interaction.channel_id:
+    if update_stats.is_running() and STATE.tracking_channel_id == interaction.channel_id:
         update_stats.cancel()
-        tracking_channel_id = None
-        status_message_id = None
-        server_start_time = None
+        reset_stats_backoff()
+        STATE.tracking_channel_id = None
+        STATE.status_message = None
+        STATE.server_start_mono = None
         await interaction.response.send_message("Player statistics updates stopped in this channel", ephemeral=True)
-    elif tracking_channel_id is None:
+    elif STATE.tracking_channel_id is None:
         await interaction.response.send_message("Player statistics updates are not running", ephemeral=True)
-    elif tracking_channel_id != interaction.channel_id:
+    elif STATE.tracking_channel_id != interaction.channel_id:
         await interaction.response.send_message("Player statistics updates are not running in this channel.", ephemeral=True)
 
-@tasks.loop(seconds=30)
+@tasks.loop(seconds=STATS_INTERVAL)
 async def update_stats():
-    global status_message_id, tracking_channel_id, server_start_time, server_online
-    if not tracking_channel_id or not status_message_id:
+    if not STATE.tracking_channel_id or not STATE.status_message:
         return
     
     try:
-        count_data, list_data, server_online = await fetch_player_data()
-        embed = await create_embed(count_data, list_data, server_online)
+        count_data, players, STATE.server_online = await fetch_player_data()
+        embed = await create_embed(count_data, players, STATE.server_online)
     except Exception as e:
         logging.error(f"Error fetching player data for stats: {e}")
-        server_online = False
-        embed = await create_embed(None, None, server_online)
+        STATE.server_online = False
+        embed = await create_embed(None, None, STATE.server_online)
+
+    # Back off while the server is unreachable, return to the normal interval on recovery
+    if STATE.server_online:
+        if STATE.offline_polls:
+            STATE.offline_polls = 0
+            update_stats.change_interval(seconds=STATS_INTERVAL)
+    else:
+        STATE.offline_polls += 1
+        update_stats.change_interval(seconds=min(STATS_INTERVAL * 2 ** STATE.offline_polls, MAX_STATS_INTERVAL))
+
+    # Skip the Discord round-trips when nothing but the uptime changed since the last edit
+    num_players = count_data["data"]["num_players"] if STATE.server_online and count_data else None
+    digest = hash((num_players, STATE.cached_player_names, STATE.server_online))
+    now = time.monotonic()
+    if digest == STATE.last_digest and now - STATE.last_edit_at < STATUS_REFRESH_INTERVAL:
+        return
       
     try:    
-        channel = bot.get_channel(tracking_channel_id)
-        if channel:
-            message = await channel.fetch_message(status_message_id)
-            await message.edit(embed=embed)
-        else:
-            logging.error(f"Channel with id: {tracking_channel_id} not found, cannot update status message")
-            status_message_id = None
-            update_stats.stop()
+        await STATE.status_message.edit(embed=embed)
+        STATE.last_digest = digest
+        STATE.last_edit_at = now
     except discord.errors.NotFound as e:
         logging.error(f"Error editing message, message not found: {e}")
-        status_message_id = None
+        STATE.status_message = None
+        reset_stats_backoff()
         update_stats.stop()
     except discord.errors.HTTPException as e:
         logging.error(f"Error editing message: {e}")
-        status_message_id = None
+        STATE.status_message = None
+        reset_stats_backoff()
         update_stats.stop()
 
+@tasks.loop(minutes=BANLIST_REFRESH_INTERVAL)
+async def refresh_banlist():
+    """Keeps the cached ban list warm so mtunban and mtshowbanned rarely wait on the API."""
+    # Don't poll while the stats loop is running and backing off from an unreachable server
+    if update_stats.is_running() and not STATE.server_online and STATE.offline_polls:
+        return
+    try:
+        await fetch_banlist()
+    except HTTP_ERRORS as e:
+        logging.error(f"Error refreshing ban list: {e}")
+
 @bot.tree.command(name="mtmsg", description="Sends a message to the game server chat.")
 @is_admin()
 async def mt_msg(interaction: discord.Interaction, message: str):
-    url = f"{API_BASE_URL}/chat?password={API_PASSWORD}&message={message}"
     try:
         await interaction.response.defer()
-        response = requests.post(url)
-        response.raise_for_status()
-        logging.info(f"Sent message to server (command): {message}, Response code: {response.status_code}")
+        status = await api_post("/chat", {**BASE_PARAMS, "message": message})
+        logging.info(f"Sent message to server (command): {message}, Response code: {status}")
         await interaction.followup.send(f"Message sent to server chat: `{message}`")
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error sending message (command): {e}, response: {e.response}")
+    except HTTP_ERRORS as e:
+        logging.error(f"Error sending message (command): {e}")
         await interaction.followup.send(f"Error sending message: {e}", ephemeral=True)
 
 @bot.tree.command(name="mtban", description="Bans a player from the server.")
 @is_admin()
 async def mt_ban(interaction: discord.Interaction, player_name: str):
-    player_list_url = f"{API_BASE_URL}/player/list?password={API_PASSWORD}"
     try:
         await interaction.response.defer()
-        list_response = requests.get(player_list_url)
-        list_response.raise_for_status()
-        list_data = list_response.json()
-        if list_data and list_data['data']:
-            player_found = False
-            for _, player in list_data['data'].items():
-                if player['name'] == player_name:
-                    unique_id = player['unique_id']
-                    player_found = True
-                    ban_url = f"{API_BASE_URL}/player/ban?password={API_PASSWORD}&unique_id={unique_id}"
-                    try:
-                        ban_response = requests.post(ban_url)
-                        ban_response.raise_for_status()
-                        logging.info(f"Banned player: {player_name}, Response code: {ban_response.status_code}")
-                        await interaction.followup.send(f"Player `{player_name}` banned from server.")
-                        break
-                    except requests.exceptions.RequestException as e:
-                        logging.error(f"Error banning player: {e}")
-                        await interaction.followup.send(f"Error banning player: {e}", ephemeral=True)
-                        break
-            if not player_found:
-                await interaction.followup.send(f"Player with name `{player_name}` not found on the server.", ephemeral=True)
-        else:
-            await interaction.followup.send("Error: Could not get player list", ephemeral=True)
-    except requests.exceptions.RequestException as e:
+        unique_id = await resolve_unique_id(player_name)
+    except HTTP_ERRORS as e:
         logging.error(f"Error retrieving player list: {e}")
         await interaction.followup.send(f"Error retrieving player list: {e}", ephemeral=True)
+        return
+
+    if unique_id is None:
+        await interaction.followup.send(f"Player with name `{player_name}` not found on the server.", ephemeral=True)
+        return
+
+    try:
+        status = await api_post("/player/ban", {**BASE_PARAMS, "unique_id": unique_id})
+        logging.info(f"Banned player: {player_name}, Response code: {status}")
+        invalidate_banlist()
+        await interaction.followup.send(f"Player `{player_name}` banned from server.")
+    except HTTP_ERRORS as e:
+        logging.error(f"Error banning player: {e}")
+        await interaction.followup.send(f"Error banning player: {e}", ephemeral=True)
 
 @bot.tree.command(name="mtkick", description="Kicks a player from the server.")
 @is_admin()
 async def mt_kick(interaction: discord.Interaction, player_name: str):
-    player_list_url = f"{API_BASE_URL}/player/list?password={API_PASSWORD}"
     try:
         await interaction.response.defer()
-        list_response = requests.get(player_list_url)
-        list_response.raise_for_status()
-        list_data = list_response.json()
-        if list_data and list_data['data']:
-            player_found = False
-            for _, player in list_data['data'].items():
-                if player['name'] == player_name:
-                    unique_id = player['unique_id']
-                    player_found = True
-                    kick_url = f"{API_BASE_URL}/player/kick?password={API_PASSWORD}&unique_id={unique_id}"
-                    try:
-                        kick_response = requests.post(kick_url)
-                        kick_response.raise_for_status()
-                        logging.info(f"Kicked player: {player_name}, Response code: {kick_response.status_code}")
-                        await interaction.followup.send(f"Player `{player_name}` kicked from server.")
-                        break
-                    except requests.exceptions.RequestException as e:
-                        logging.error(f"Error kicking player: {e}")
-                        await interaction.followup.send(f"Error kicking player: {e}", ephemeral=True)
-                        break
-            if not player_found:
-                await interaction.followup.send(f"Player with name `{player_name}` not found on the server.", ephemeral=True)
-        else:
-            await interaction.followup.send("Error: Could not get player list", ephemeral=True)
-    except requests.exceptions.RequestException as e:
+        unique_id = await resolve_unique_id(player_name)
+    except HTTP_ERRORS as e:
         logging.error(f"Error retrieving player list: {e}")
         await interaction.followup.send(f"Error retrieving player list: {e}", ephemeral=True)
+        return
+
+    if unique_id is None:
+        await interaction.followup.send(f"Player with name `{player_name}` not found on the server.", ephemeral=True)
+        return
+
+    try:
+        status = await api_post("/player/kick", {**BASE_PARAMS, "unique_id": unique_id})
+        logging.info(f"Kicked player: {player_name}, Response code: {status}")
+        await interaction.followup.send(f"Player `{player_name}` kicked from server.")
+    except HTTP_ERRORS as e:
+        logging.error(f"Error kicking player: {e}")
+        await interaction.followup.send(f"Error kicking player: {e}", ephemeral=True)
 
 @bot.tree.command(name="mtunban", description="Unbans a player from the server.")
 @is_admin()
 async def mt_unban(interaction: discord.Interaction, player_name: str):
-    ban_list_url = f"{API_BASE_URL}/player/banlist?password={API_PASSWORD}"
     try:
         await interaction.response.defer()
-        ban_response = requests.get(ban_list_url)
-        ban_response.raise_for_status()
-        ban_data = ban_response.json()
-        if ban_data and ban_data['data']:
-            player_found = False
-            for _, player in ban_data['data'].items():
-                if player['name'] == player_name:
-                    unique_id = player['unique_id']
-                    player_found = True
-                    unban_url = f"{API_BASE_URL}/player/unban?password={API_PASSWORD}&unique_id={unique_id}"
-                    try:
-                        unban_response = requests.post(unban_url)
-                        unban_response.raise_for_status()
-                        logging.info(f"Unbanned player: {player_name}, Response code: {unban_response.status_code}")
-                        await interaction.followup.send(f"Player `{player_name}` unbanned from server.")
-                        break
-                    except requests.exceptions.RequestException as e:
-                        logging.error(f"Error unbanning player: {e}")
-                        await interaction.followup.send(f"Error unbanning player: {e}", ephemeral=True)
-                        break
-            if not player_found:
-                await interaction.followup.send(f"Player with name `{player_name}` not found on the ban list.", ephemeral=True)
-        else:
-            await interaction.followup.send("Error: Could not get ban list", ephemeral=True)
-    except requests.exceptions.RequestException as e:
+        unique_id = await resolve_banned_unique_id(player_name)
+    except HTTP_ERRORS as e:
         logging.error(f"Error retrieving ban list: {e}")
         await interaction.followup.send(f"Error retrieving ban list: {e}", ephemeral=True)
+        return
+
+    if unique_id is None:
+        await interaction.followup.send(f"Player with name `{player_name}` not found on the ban list.", ephemeral=True)
+        return
+
+    try:
+        status = await api_post("/player/unban", {**BASE_PARAMS, "unique_id": unique_id})
+        logging.info(f"Unbanned player: {player_name}, Response code: {status}")
+        invalidate_banlist()
+        await interaction.followup.send(f"Player `{player_name}` unbanned from server.")
+    except HTTP_ERRORS as e:
+        logging.error(f"Error unbanning player: {e}")
+        await interaction.followup.send(f"Error unbanning player: {e}", ephemeral=True)
 
 @bot.tree.command(name="mtshowbanned", description="Displays a list of banned players")
 @is_admin()
 async def mt_showbanned(interaction: discord.Interaction):
-    ban_list_url = f"{API_BASE_URL}/player/banlist?password={API_PASSWORD}"
     try:
         await interaction.response.defer()
-        ban_response = requests.get(ban_list_url)
-        ban_response.raise_for_status()
-        ban_data = ban_response.json()
+        ban_data = await get_banlist()
         embed = await create_banlist_embed(ban_data)
         await interaction.followup.send(embed=embed)
-    except requests.exceptions.RequestException as e:
+    except HTTP_ERRORS as e:
         logging.error(f"Error retrieving ban list: {e}")
         await interaction.followup.send(f"Error retrieving ban list: {e}", ephemeral=True)
 
-@bot.event
-async def on_message(message):
-    """Event that gets called when a message is sent"""
-    pass
-
 @bot.tree.error
 async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
     if isinstance(error, app_commands.CheckFailure):
@@ -410,10 +556,35 @@ async def on_app_command_error(interaction: discord.Interaction, error: app_comm
 async def on_ready():
     """Event that gets called when the bot is ready."""
     print(f'Logged in as {bot.user.name}')
+    if not refresh_banlist.is_running():
+        refresh_banlist.start()
+    # on_ready fires again after reconnects, the command tree only needs to be synced once
+    if STATE.commands_synced:
+        return
     try:
-        synced = await bot.tree.sync()
+        if GUILD_ID:
+            # Guild commands are available immediately, global commands take a while to propagate
+            guild = discord.Object(id=GUILD_ID)
+            bot.tree.copy_global_to(guild=guild)
+            synced = await bot.tree.sync(guild=guild)
+        else:
+            synced = await bot.tree.sync()
+        STATE.commands_synced = True
         print(f'Synced {len(synced)} commands')
     except Exception as e:
         logging.error(f"Error syncing commands: {e}")
 
-bot.run(TOKEN)
\ No newline at end of file
+async def main():
+    """Runs the bot with a shared HTTP session that is closed on shutdown."""
+    global session
+    # Only the game server API and the webhook are contacted, so a small pool with
+    # long-lived keep-alive connections and cached DNS lookups is enough
+    connector = aiohttp.TCPConnector(limit=10, limit_per_host=4, ttl_dns_cache=300, keepalive_timeout=60)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async with bot:
+            await bot.start(TOKEN)
+
+try:
+    asyncio.run(main())
+except KeyboardInterrupt:
+    pass